@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Min
+
+from app.models import BaseEndpoint, RelativeEndpoint
+
+
+class Command(BaseCommand):
+	help = 'Removes duplicate endpoints, keeping the oldest one, so the unique constraints can be migrated'
+
+	@transaction.atomic
+	def handle(self, *args, **options):
+		# base endpoints are merged first, their relative endpoints move to the kept one and may become duplicates
+		duplicates = BaseEndpoint.objects.order_by().values('endpoint').annotate(
+			keep_id=Min('id'), count=Count('id')
+		).filter(count__gt=1)
+		stale_base_ids = []
+		for duplicate in duplicates:
+			ids = BaseEndpoint.objects.filter(
+				endpoint=duplicate['endpoint']
+			).exclude(id=duplicate['keep_id']).values_list('id', flat=True)
+			RelativeEndpoint.objects.filter(base_endpoint_id__in=ids).update(base_endpoint_id=duplicate['keep_id'])
+			stale_base_ids += ids
+		BaseEndpoint.objects.filter(id__in=stale_base_ids).delete()
+
+		duplicates = RelativeEndpoint.objects.order_by().values('base_endpoint', 'endpoint', 'method').annotate(
+			keep_id=Min('id'), count=Count('id')
+		).filter(count__gt=1)
+		stale_ids = []
+		for duplicate in duplicates:
+			stale_ids += RelativeEndpoint.objects.filter(
+				base_endpoint=duplicate['base_endpoint'], endpoint=duplicate['endpoint'], method=duplicate['method']
+			).exclude(id=duplicate['keep_id']).values_list('id', flat=True)
+		RelativeEndpoint.objects.filter(id__in=stale_ids).delete()
+		self.stdout.write(
+			f'Removed {len(stale_base_ids)} duplicate base endpoints and {len(stale_ids)} duplicate relative endpoints'
+		)
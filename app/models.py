@@ -1,12 +1,14 @@
 from django.db import models
-import json
+import orjson
 import re
 
 from utils.model_mixin import AutoCreatedUpdatedMixin
 
+REGEX_PARAM_PATTERN = re.compile(r'<str:(.*?)>')
+
 
 class BaseEndpoint(AutoCreatedUpdatedMixin):
-	endpoint = models.TextField(blank=True, default='')
+	endpoint = models.TextField(blank=True, default='', unique=True)
 
 
 class RelativeEndpoint(AutoCreatedUpdatedMixin):
@@ -24,20 +26,27 @@ class RelativeEndpoint(AutoCreatedUpdatedMixin):
 	method = models.TextField(max_length=4, choices=METHODS)
 	meta_data = models.TextField(blank=True, default='{"num_records": 1, "is_paginated": false, "records_per_page": 1}')
 
+	class Meta(AutoCreatedUpdatedMixin.Meta):
+		constraints = [
+			models.UniqueConstraint(fields=['base_endpoint', 'endpoint', 'method'], name='unique_relative_endpoint')
+		]
+		indexes = [
+			models.Index(fields=['base_endpoint', '-created_at'])
+		]
+
 	@property
 	def url_params(self):
-		pat = re.compile(r'<str:(.*?)>')
-		return pat.findall(self.regex_endpoint)
+		return REGEX_PARAM_PATTERN.findall(self.regex_endpoint)
 
 	def save(self, *args, **kwargs):
 		if isinstance(self.meta_data, dict):
-			self.meta_data = json.dumps(self.meta_data)
+			self.meta_data = orjson.dumps(self.meta_data).decode()
 		super().save(*args, **kwargs)
 
 	process_fields = AutoCreatedUpdatedMixin.get_process_fields_copy()
 	process_fields.update(**dict(
 		fields=lambda x: x.fields.detail(),
-		meta_data=lambda x: json.loads(x),
+		meta_data=lambda x: orjson.loads(x),
 		url_params=lambda x: x.url_params
 	))
 
@@ -45,6 +54,11 @@ class RelativeEndpoint(AutoCreatedUpdatedMixin):
 class Schema(AutoCreatedUpdatedMixin):
 	name = models.TextField(blank=False, null=False)
 
+	class Meta(AutoCreatedUpdatedMixin.Meta):
+		indexes = [
+			models.Index(fields=['name'])
+		]
+
 	def resolve_schema(self, data):
 		if data.type == Field.VALUE:
 			return PrimitiveDataType.CHOICES[data.value]
@@ -11,3 +11,7 @@ def relative_endpoints_get(base_endpoint_id):
 
 def schemas_get():
 	return Schema.objects.all().detail()
+
+
+def schema_names_get():
+	return set(Schema.objects.order_by().values_list('name', flat=True))
@@ -1,15 +1,24 @@
-import json
+from operator import itemgetter
+
+import orjson
+
+from django.db import transaction, IntegrityError
 
 from .models import BaseEndpoint, RelativeEndpoint, Schema, SchemaData, Field, PrimitiveDataType
-from utils.exceptions import NotAllowed
-from .utils import format_and_regex_endpoint
+from utils.exceptions import NotAllowed, NotFound
+from utils.queryset import clear_tables, reset_sequences
+from .selectors import schema_names_get
+from .utils import format_and_regex_endpoint, stream_json_array
+
+PRIMITIVE_DATA_TYPES = {data_type: index for index, data_type in enumerate(PrimitiveDataType.CHOICES)}
+PRIMITIVE_DATA_TYPES_STR = ', '.join(PrimitiveDataType.CHOICES)
+EXPORT_CHUNK_SIZE = 2000
 
 
 def base_endpoint_add(data):
-	if data['endpoint'].startswith('/'):
-		data['endpoint'] = data['endpoint'][1:]
-	endpoint = BaseEndpoint.objects.get_or_create(endpoint=data['endpoint'])
-	return endpoint
+	data['endpoint'] = data['endpoint'].lstrip('/')
+	endpoint, _ = BaseEndpoint.objects.get_or_create(endpoint=data['endpoint'])
+	return endpoint.id
 
 
 def relative_endpoint_add(data):
@@ -17,80 +26,89 @@ def relative_endpoint_add(data):
 	if data['method'] not in methods:
 		raise NotAllowed(f"Please enter valid method, i.e. one of {', '.join(methods)}")
 	data['endpoint'], data['regex_endpoint'] = format_and_regex_endpoint(data['endpoint'])
-	if RelativeEndpoint.objects.filter(
-			base_endpoint_id=data['id'], endpoint=data['endpoint'], method=data['method']
-	).exists():
+	try:
+		with transaction.atomic():
+			relative_endpoint = RelativeEndpoint.objects.create(
+				base_endpoint_id=data['id'], endpoint=data['endpoint'], method=data['method'],
+				regex_endpoint=data['regex_endpoint']
+			)
+	except IntegrityError:  # unique_relative_endpoint constraint
 		raise NotAllowed("Endpoint with same method already exists")
-	relative_endpoint = RelativeEndpoint.objects.create(
-		base_endpoint_id=data['id'], endpoint=data['endpoint'], method=data['method'],
-		regex_endpoint=data['regex_endpoint']
-	)
 	return relative_endpoint
 
 
+@transaction.atomic
 def schema_add(data):
 	if Schema.objects.filter(name=data['name']).exists():
 		raise NotAllowed(f"{data['name']} schema already exists")
 	schema = Schema.objects.create(name=data['name'])
+	schema_names = {field['value'] for field in data['fields'] if field['type'] == 'schema'}
+	schema_ids = dict(Schema.objects.filter(name__in=schema_names).values_list('name', 'id'))
 	schema_datas = []
 	for field in data['fields']:
 		schema_data = SchemaData(schema=schema, key=field['key'], type=field['type'])
 		if field['type'] == 'schema':
-			schema_data.value = Schema.objects.get(name=field['value']).id
+			if field['value'] not in schema_ids:
+				raise NotAllowed(f"{field['value']} schema does not exist")
+			schema_data.value = schema_ids[field['value']]
 		else:
-			if field['value'] not in PrimitiveDataType.CHOICES:
-				raise NotAllowed(
-					f"Please enter valid data type, i.e. one of {', '.join(PrimitiveDataType.CHOICES)}"
-				)
-			schema_data.value = PrimitiveDataType.CHOICES.index(field['value'])
+			data_type = PRIMITIVE_DATA_TYPES.get(field['value'])
+			if data_type is None:
+				raise NotAllowed(f"Please enter valid data type, i.e. one of {PRIMITIVE_DATA_TYPES_STR}")
+			schema_data.value = data_type
 		schema_datas.append(schema_data)
 	SchemaData.objects.bulk_create(schema_datas)
 	return schema.detail()
 
 
+@transaction.atomic
 def endpoint_schema_update(data):
 	new_fields = []
 	endpoint = RelativeEndpoint.objects.get(id=data['id'])
-	endpoint.fields.exclude(
+	stale_fields = endpoint.fields.exclude(
 		id__in=[field['id'] for field in data['fields'] if 'id' in field and field['id'] > 0]
-	).delete()  # delete fields which are no longer needed
+	)
+	# delete fields which are no longer needed, nothing references or listens to Field deletes
+	# so skip the collector and issue a single DELETE
+	stale_fields._raw_delete(stale_fields.db)
 	fields_to_change = []  # contains fields which need to be changed
-	available_url_params = endpoint.url_params  # available url parameters
-	schemas = list(Schema.objects.all().values_list('name', flat=True))  # available schemas
+	available_url_params = set(endpoint.url_params)  # available url parameters
+	schemas = schema_names_get()  # available schemas
+	allowed_values = {  # field type -> (acceptable values, what they are called, how they are listed)
+		Field.SCHEMA: (schemas, 'schema name', None),
+		Field.VALUE: (PRIMITIVE_DATA_TYPES, 'data type', PRIMITIVE_DATA_TYPES_STR),
+		Field.URL_PARAM: (available_url_params, 'url param', None),
+	}
 	for field in data['fields']:
-		if 'isChanged' not in field:
+		is_changed = field.get('isChanged')
+		if is_changed is None:
 			continue
-		if field['type'] == Field.SCHEMA:
-			if field['value'] not in schemas:  # check if that data type is acceptable
+		field_type, value = field['type'], field['value']
+		allowed = allowed_values.get(field_type)
+		if allowed is not None:
+			values, name, choices = allowed
+			if value not in values:  # check if that value is acceptable
 				raise NotAllowed(
-					f"Please enter valid schema name for '{field['key']}', i.e. one of "
-					f"{', '.join(schemas)}"
+					f"Please enter valid {name} for '{field['key']}', i.e. one of "
+					f"{choices or ', '.join(sorted(values))}"
 				)
-		elif field['type'] == Field.VALUE:
-			if field['value'] not in PrimitiveDataType.CHOICES:  # check if that data type is acceptable
-				raise NotAllowed(
-					f"Please enter valid data type for '{field['key']}', i.e. one of "
-					f"{', '.join(PrimitiveDataType.CHOICES)}"
-				)
-		elif field['type'] == Field.URL_PARAM:
-			if field['value'] not in available_url_params:
-				raise NotAllowed(
-					f"Please enter valid url param for '{field['key']}', i.e. one of "
-					f"{', '.join(available_url_params)}"
-				)
-		elif field['type'] == Field.QUERY_PARAM:
-			if not field['value']:
+		elif field_type == Field.QUERY_PARAM:
+			if not value:
 				raise NotAllowed(f"Please enter valid string for '{field['key']}")
 		else:
 			raise NotAllowed(f'The field type should be one of {Field.SCHEMA}, {Field.VALUE}, {Field.URL_PARAM}')
-		if field['isChanged']:  # old fields
+		if is_changed:  # old fields
 			fields_to_change.append(field)
 		else:  # new fields
 			new_fields.append(field)
-	for field in fields_to_change:
-		Field.objects.filter(id=field['id']).update(
-			key=field['key'], value=field['value'], type=field['type'], is_array=field['is_array']
-		)
+	Field.objects.bulk_update(
+		[
+			Field(
+				id=field['id'], key=field['key'], value=field['value'], type=field['type'],
+				is_array=field['is_array']
+			) for field in fields_to_change
+		], fields=['key', 'value', 'type', 'is_array'], batch_size=500
+	)
 	Field.objects.bulk_create(
 		[
 			Field(
@@ -105,60 +123,102 @@ def endpoint_schema_update(data):
 
 
 def relative_endpoint_update(data):
-	relative_endpoint = RelativeEndpoint.objects.select_related('base_endpoint').get(id=data['id'])
 	data['endpoint'], data['regex_endpoint'] = format_and_regex_endpoint(data['endpoint'])
-	if RelativeEndpoint.objects.filter(base_endpoint=relative_endpoint.base_endpoint_id, endpoint=data['endpoint'], method=data['method']).exists():
+	try:
+		with transaction.atomic():
+			updated = RelativeEndpoint.objects.filter(id=data['id']).update(
+				endpoint=data['endpoint'], method=data['method'], regex_endpoint=data['regex_endpoint']
+			)
+	except IntegrityError:  # unique_relative_endpoint constraint
 		raise NotAllowed("Endpoint with same url exists")
-	RelativeEndpoint.objects.filter(id=data['id']).update(
-		endpoint=data['endpoint'], method=data['method'], regex_endpoint=data['regex_endpoint']
-	)
+	if not updated:
+		raise NotFound('The relativeendpoint requested for does not exist')
 
 
 def relative_endpoint_delete(data):
 	RelativeEndpoint.objects.filter(id=data['id']).delete()
 
 
+def relative_endpoints_export():
+	# fields and endpoints are both read in endpoint order and merged, so neither is held in memory
+	fields = Field.objects.order_by('relative_endpoint_id', 'id').values(
+		'id', 'key', 'type', 'value', 'is_array', 'relative_endpoint_id'
+	).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+	field = next(fields, None)
+	relative_endpoints = RelativeEndpoint.objects.order_by('id').values(
+		'id', 'base_endpoint_id', 'endpoint', 'regex_endpoint', 'method', 'meta_data'
+	).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+	for endpoint in relative_endpoints:
+		endpoint['base_endpoint'] = endpoint.pop('base_endpoint_id')
+		endpoint['meta_data'] = orjson.loads(endpoint['meta_data'])
+		endpoint['fields'] = []
+		while field is not None and field['relative_endpoint_id'] <= endpoint['id']:
+			if field.pop('relative_endpoint_id') == endpoint['id']:
+				endpoint['fields'].append(field)
+			field = next(fields, None)
+		yield endpoint
+
+
+def schema_data_export():
+	schema_datas = SchemaData.objects.order_by('id').values('id', 'schema_id', 'key', 'value', 'type')
+	for schema_data in schema_datas.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+		schema_data['schema'] = schema_data.pop('schema_id')
+		yield schema_data
+
+
 def data_export():
-	response = dict()
-	response['base_endpoints'] = BaseEndpoint.objects.all().detail()
-	response['relative_endpoints'] = RelativeEndpoint.objects.all().detail()
-	response['schema'] = Schema.objects.all().detail()
-	response['fields'] = Field.objects.all().detail()
-	response['schema_data'] = SchemaData.objects.all().detail()
-	return response
+	# rows are ordered by id, imported rows have no timestamps so the default ordering would not round trip
+	tables = dict(
+		base_endpoints=BaseEndpoint.objects.order_by('id').values('id', 'endpoint').iterator(
+			chunk_size=EXPORT_CHUNK_SIZE
+		),
+		fields=Field.objects.order_by('id').values('id', 'key', 'type', 'value', 'is_array').iterator(
+			chunk_size=EXPORT_CHUNK_SIZE
+		),
+		relative_endpoints=relative_endpoints_export(),
+		schema=Schema.objects.order_by('id').values('id', 'name').iterator(chunk_size=EXPORT_CHUNK_SIZE),
+		schema_data=schema_data_export()
+	)
+	separator = b'{'
+	for name, rows in tables.items():
+		yield separator + orjson.dumps(name) + b':'
+		yield from stream_json_array(rows, EXPORT_CHUNK_SIZE)
+		separator = b','
+	yield b'}'
 
 
+@transaction.atomic
 def data_import(data):
-	for model in [BaseEndpoint, RelativeEndpoint, Field, Schema, SchemaData]:
-		model.objects.all().delete()
-
-	base_endpoints = [BaseEndpoint(**endpoint) for endpoint in data['base_endpoints']]
-	BaseEndpoint.objects.bulk_create(base_endpoints)
-
-	relative_endpoints = []
-	fields = []
-	for endpoint in data['relative_endpoints']:
-		for field in endpoint['fields']:
-			field['relative_endpoint_id'] = endpoint['id']
-			fields.append(field)
-		del endpoint['fields']
-		del endpoint['url_params']
-		endpoint['base_endpoint_id'] = endpoint['base_endpoint']
-		del endpoint['base_endpoint']
-		endpoint['meta_data'] = json.dumps(endpoint['meta_data'])
-
-		relative_endpoints.append(RelativeEndpoint(**endpoint))
-	RelativeEndpoint.objects.bulk_create(relative_endpoints)
-	Field.objects.bulk_create([Field(**field) for field in fields])
-
-	schemas = []
-	for schema in data['schema']:
-		del schema['schema']
-		schemas.append(Schema(**schema))
-	Schema.objects.bulk_create(schemas)
-
-	for schema_data in data['schema_data']:
-		schema_data['schema_id'] = schema_data['schema']
-		del schema_data['schema']
-	schema_datas = [SchemaData(**schema_data) for schema_data in data['schema_data']]
-	SchemaData.objects.bulk_create(schema_datas)
+	clear_tables(SchemaData, Field, RelativeEndpoint, Schema, BaseEndpoint)
+
+	try:
+		BaseEndpoint.objects.bulk_insert(
+			['id', 'endpoint'], list(map(itemgetter('id', 'endpoint'), data['base_endpoints']))
+		)
+
+		endpoint_columns = itemgetter('id', 'base_endpoint', 'endpoint', 'regex_endpoint', 'method')
+		RelativeEndpoint.objects.bulk_insert(
+			['id', 'base_endpoint_id', 'endpoint', 'regex_endpoint', 'method', 'meta_data'], [
+				(*endpoint_columns(endpoint), orjson.dumps(endpoint['meta_data']).decode())
+				for endpoint in data['relative_endpoints']
+			]
+		)
+	except IntegrityError:  # endpoint and unique_relative_endpoint constraints
+		raise NotAllowed("The imported data contains duplicate endpoints")
+
+	field_columns = itemgetter('id', 'key', 'type', 'value', 'is_array')
+	Field.objects.bulk_insert(
+		['id', 'key', 'type', 'value', 'is_array', 'relative_endpoint_id'], [
+			(*field_columns(field), endpoint['id'])
+			for endpoint in data['relative_endpoints'] for field in endpoint['fields']
+		]
+	)
+
+	Schema.objects.bulk_insert(['id', 'name'], list(map(itemgetter('id', 'name'), data['schema'])))
+
+	SchemaData.objects.bulk_insert(
+		['id', 'schema_id', 'key', 'value', 'type'],
+		list(map(itemgetter('id', 'schema', 'key', 'value', 'type'), data['schema_data']))
+	)
+
+	reset_sequences(BaseEndpoint, RelativeEndpoint, Field, Schema, SchemaData)
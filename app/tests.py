@@ -1,3 +1,311 @@
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection, IntegrityError
 from django.test import TestCase
+from django.utils.translation import gettext_lazy
+
+from .models import BaseEndpoint, RelativeEndpoint, Field, Schema
+from utils.exceptions import NotFound
+from utils.queryset import BaseQuerySet
+from utils.middleware import jsonify
+from utils.response import OrjsonResponse
+
+
+class ApiTestCase(TestCase):
+	def post(self, url, data):
+		return self.client.post(f'/api/{url}', data, content_type='application/json')
+
+	def add_relative_endpoint(self, base_endpoint_id, endpoint, method='GET'):
+		response = self.post('relative-endpoints/add/', dict(id=base_endpoint_id, endpoint=endpoint, method=method))
+		self.assertEqual(response.status_code, 200)
+		return response.json()['id']
+
+
+class EndpointSchemaUpdateTest(ApiTestCase):
+	def setUp(self):
+		base_endpoint = BaseEndpoint.objects.create(endpoint='api')
+		self.endpoint_id = self.add_relative_endpoint(base_endpoint.id, 'users/:id')
+		self.field = Field.objects.create(relative_endpoint_id=self.endpoint_id, key='name', type='value', value='string')
+
+	def update_schema(self, fields):
+		meta_data = dict(num_records=1, is_paginated=False, records_per_page=1)
+		return self.post('update_schema/', dict(id=self.endpoint_id, fields=fields, meta_data=meta_data))
+
+	def test_invalid_field_keeps_existing_fields(self):
+		response = self.update_schema([
+			dict(key='user', type='url_param', value='missing', is_array=False, isChanged=False)
+		])
+		self.assertEqual(response.status_code, 409)
+		self.assertTrue(Field.objects.filter(id=self.field.id).exists())
+
+	def test_invalid_data_type_lists_choices_in_order(self):
+		response = self.update_schema([
+			dict(key='name', type='value', value='date', is_array=False, isChanged=False)
+		])
+		self.assertEqual(response.status_code, 409)
+		self.assertEqual(
+			response.json()['error'], "Please enter valid data type for 'name', i.e. one of string, number, boolean"
+		)
+
+	def test_new_schema_can_be_used(self):
+		response = self.post('schema/add/', dict(name='user', fields=[dict(key='name', type='value', value='string')]))
+		self.assertEqual(response.status_code, 200)
+		response = self.update_schema([
+			dict(key='user', type='schema', value='user', is_array=False, isChanged=False)
+		])
+		self.assertEqual(response.status_code, 200)
+
+	def test_update_replaces_fields(self):
+		response = self.update_schema([
+			dict(key='user', type='url_param', value='id', is_array=False, isChanged=False)
+		])
+		self.assertEqual(response.status_code, 200)
+		fields = RelativeEndpoint.objects.get(id=self.endpoint_id).fields.values_list('key', 'value')
+		self.assertEqual(list(fields), [('user', 'id')])
+
+
+class ValidationTest(ApiTestCase):
+	def test_missing_key(self):
+		response = self.post('base-endpoint/add/', dict())
+		self.assertEqual(response.status_code, 401)
+		self.assertEqual(response.json(), dict(error="must contain ['endpoint'] properties"))
+
+	def test_nested_type_error(self):
+		response = self.post('schema/add/', dict(name='user', fields=[dict(key='name', type='value', value=['x'])]))
+		self.assertEqual(response.status_code, 401)
+		self.assertEqual(response.json(), dict(error='fields.0.value must be string'))
+
+	def test_nested_missing_key(self):
+		response = self.post('schema/add/', dict(name='user', fields=[dict(key='name', type='value')]))
+		self.assertEqual(response.status_code, 401)
+		self.assertEqual(response.json(), dict(error="fields.0 must contain ['value'] properties"))
+
+
+class SchemaAddTest(ApiTestCase):
+	def test_unknown_referenced_schema_is_not_allowed(self):
+		response = self.post('schema/add/', dict(name='user', fields=[
+			dict(key='name', type='value', value='string'),
+			dict(key='address', type='schema', value='address')
+		]))
+		self.assertEqual(response.status_code, 409)
+		self.assertEqual(response.json()['error'], 'address schema does not exist')
+		self.assertFalse(Schema.objects.exists())
+
+	def test_referenced_schema_is_resolved(self):
+		self.post('schema/add/', dict(name='address', fields=[dict(key='city', type='value', value='string')]))
+		response = self.post('schema/add/', dict(name='user', fields=[
+			dict(key='name', type='value', value='string'),
+			dict(key='address', type='schema', value='address')
+		]))
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json()['schema']['schema'], dict(name='string', address=dict(city='string')))
+
+
+class RelativeEndpointAddTest(ApiTestCase):
+	def setUp(self):
+		self.base_endpoint = BaseEndpoint.objects.create(endpoint='api')
+
+	def test_duplicate_endpoint_is_not_allowed(self):
+		self.add_relative_endpoint(self.base_endpoint.id, 'users')
+		response = self.post('relative-endpoints/add/', dict(id=self.base_endpoint.id, endpoint='users', method='GET'))
+		self.assertEqual(response.status_code, 409)
+		self.assertEqual(RelativeEndpoint.objects.count(), 1)
+
+	def test_same_endpoint_with_other_method_is_allowed(self):
+		self.add_relative_endpoint(self.base_endpoint.id, 'users')
+		self.add_relative_endpoint(self.base_endpoint.id, 'users', method='POST')
+		self.assertEqual(RelativeEndpoint.objects.count(), 2)
+
+
+class GetOrCreateTest(TestCase):
+	def test_returns_created_flag(self):
+		endpoint, created = BaseEndpoint.objects.get_or_create(endpoint='api')
+		self.assertTrue(created)
+		self.assertEqual(BaseEndpoint.objects.get_or_create(endpoint='api'), (endpoint, False))
+
+	def test_defaults_override_lookup(self):
+		endpoint, created = BaseEndpoint.objects.get_or_create(endpoint='api', defaults=dict(endpoint='other'))
+		self.assertTrue(created)
+		self.assertEqual(endpoint.endpoint, 'other')
+
+	def test_concurrent_create_returns_existing_row(self):
+		endpoint = BaseEndpoint.objects.create(endpoint='api')
+		real_get = BaseQuerySet.get
+		lookups = []
+
+		def get(queryset, **kwargs):
+			lookups.append(kwargs)
+			if len(lookups) == 1:  # the first lookup misses, as if the row was inserted right after it
+				raise NotFound()
+			return real_get(queryset, **kwargs)
+
+		with mock.patch.object(BaseQuerySet, 'get', get):
+			self.assertEqual(BaseEndpoint.objects.get_or_create(endpoint='api'), (endpoint, False))
+		self.assertEqual(len(lookups), 2)
+
+
+class RelativeEndpointUpdateTest(ApiTestCase):
+	def setUp(self):
+		base_endpoint = BaseEndpoint.objects.create(endpoint='api')
+		self.users_id = self.add_relative_endpoint(base_endpoint.id, 'users')
+		self.posts_id = self.add_relative_endpoint(base_endpoint.id, 'posts')
+
+	def update(self, endpoint_id, endpoint, method='GET'):
+		return self.post('relative-endpoint/update/', dict(id=endpoint_id, endpoint=endpoint, method=method))
+
+	def test_duplicate_url_is_not_allowed(self):
+		response = self.update(self.posts_id, 'users')
+		self.assertEqual(response.status_code, 409)
+		self.assertEqual(RelativeEndpoint.objects.get(id=self.posts_id).endpoint, '/posts/')
+
+	def test_unchanged_url_is_allowed(self):
+		response = self.update(self.users_id, 'users')
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(RelativeEndpoint.objects.get(id=self.users_id).endpoint, '/users/')
+
+	def test_changed_url_is_saved(self):
+		response = self.update(self.users_id, 'users/:id', method='PUT')
+		self.assertEqual(response.status_code, 200)
+		endpoint = RelativeEndpoint.objects.get(id=self.users_id)
+		self.assertEqual((endpoint.endpoint, endpoint.regex_endpoint, endpoint.method), ('/users/:id/', '/users/<str:id>/', 'PUT'))
+
+	def test_missing_endpoint_is_not_found(self):
+		response = self.update(self.posts_id + 100, 'comments')
+		self.assertEqual(response.status_code, 404)
+
+
+class DataExportImportTest(ApiTestCase):
+	def setUp(self):
+		base_endpoint = BaseEndpoint.objects.create(endpoint='api')
+		self.add_relative_endpoint(base_endpoint.id, 'empty')  # endpoint without fields
+		users_id = self.add_relative_endpoint(base_endpoint.id, 'users/:id')
+		self.add_relative_endpoint(base_endpoint.id, 'users/:id', method='POST')
+		self.post('schema/add/', dict(name='address', fields=[dict(key='city', type='value', value='string')]))
+		self.post('update_schema/', dict(
+			id=users_id, meta_data=dict(num_records=3, is_paginated=True, records_per_page=2), fields=[
+				dict(key='id', type='url_param', value='id', is_array=False, isChanged=False),
+				dict(key='name', type='value', value='string', is_array=False, isChanged=False),
+				dict(key='address', type='schema', value='address', is_array=True, isChanged=False),
+			]
+		))
+
+	def export(self):
+		response = self.client.get('/api/data/export/')
+		self.assertEqual(response.status_code, 200)
+		return json.loads(b''.join(response.streaming_content))
+
+	def test_export_nests_fields_under_their_endpoint(self):
+		data = self.export()
+		self.assertEqual(
+			[(endpoint['endpoint'], endpoint['method'], len(endpoint['fields'])) for endpoint in data['relative_endpoints']],
+			[('/empty/', 'GET', 0), ('/users/:id/', 'GET', 3), ('/users/:id/', 'POST', 0)]
+		)
+		self.assertEqual(data['relative_endpoints'][1]['meta_data']['num_records'], 3)
+		self.assertEqual(len(data['fields']), 3)
+		self.assertEqual([schema['name'] for schema in data['schema']], ['address'])
+
+	def test_export_import_round_trip(self):
+		data = self.export()
+		response = self.post('data/import/', data)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(self.export(), data)
+		self.assertEqual(Field.objects.count(), 3)
+		self.assertEqual(Schema.objects.get().get_schema(), dict(city='string'))
+
+	def test_export_empty_database(self):
+		self.post('data/import/', dict(base_endpoints=[], relative_endpoints=[], schema=[], schema_data=[]))
+		self.assertEqual(
+			self.export(), dict(base_endpoints=[], fields=[], relative_endpoints=[], schema=[], schema_data=[])
+		)
+
+
+class BulkInsertTest(TestCase):
+	def test_inserts_rows_with_their_ids(self):
+		inserted = BaseEndpoint.objects.bulk_insert(['id', 'endpoint'], [(7, 'api'), (9, '')])
+		self.assertEqual(inserted, 2)
+		self.assertEqual(list(BaseEndpoint.objects.order_by('id').values_list('id', 'endpoint')), [(7, 'api'), (9, '')])
+
+	def test_postgres_copies_rows_as_csv(self):
+		# there is no postgres in the test setup, so the COPY branch runs against a mocked cursor
+		copies = []
+		with mock.patch.object(connection, 'vendor', 'postgresql'), mock.patch(
+			'django.db.backends.utils.CursorWrapper.copy_expert', create=True,
+			side_effect=lambda sql, buffer: copies.append((sql, buffer.read()))
+		):
+			inserted = BaseEndpoint.objects.bulk_insert(['id', 'endpoint'], [(7, 'api'), (9, '')])
+		self.assertEqual(inserted, 2)
+		self.assertEqual(copies, [(
+			'COPY "app_baseendpoint" ("id", "endpoint") FROM STDIN WITH (FORMAT csv)', '"7","api"\r\n"9",""\r\n'
+		)])
+
+	def test_postgres_copy_errors_are_wrapped(self):
+		with mock.patch.object(connection, 'vendor', 'postgresql'), mock.patch(
+			'django.db.backends.utils.CursorWrapper.copy_expert', create=True,
+			side_effect=connection.Database.IntegrityError('duplicate key value violates unique constraint')
+		):
+			with self.assertRaises(IntegrityError):
+				BaseEndpoint.objects.bulk_insert(['id', 'endpoint'], [(7, 'api')])
+
+
+class BaseEndpointAddTest(ApiTestCase):
+	def test_existing_endpoint_returns_its_id(self):
+		response = self.post('base-endpoint/add/', dict(endpoint='/api'))
+		self.assertEqual(response.status_code, 200)
+		endpoint_id = response.json()['id']
+		self.assertEqual(BaseEndpoint.objects.get(id=endpoint_id).endpoint, 'api')
+		response = self.post('base-endpoint/add/', dict(endpoint='api'))
+		self.assertEqual(response.json()['id'], endpoint_id)
+		self.assertEqual(BaseEndpoint.objects.count(), 1)
+
+	def test_import_with_duplicate_endpoints_is_not_allowed(self):
+		BaseEndpoint.objects.create(endpoint='existing')
+		response = self.post('data/import/', dict(
+			base_endpoints=[dict(id=1, endpoint='api'), dict(id=2, endpoint='api')],
+			relative_endpoints=[], schema=[], schema_data=[]
+		))
+		self.assertEqual(response.status_code, 409)
+		self.assertEqual(list(BaseEndpoint.objects.values_list('endpoint', flat=True)), ['existing'])
+
+	def test_import_with_duplicate_endpoints_is_not_allowed_on_postgres(self):
+		BaseEndpoint.objects.create(endpoint='existing')
+		with mock.patch.object(connection, 'vendor', 'postgresql'), mock.patch(
+			'django.db.backends.utils.CursorWrapper.copy_expert', create=True,
+			side_effect=connection.Database.IntegrityError('duplicate key value violates unique constraint')
+		):
+			response = self.post('data/import/', dict(
+				base_endpoints=[dict(id=1, endpoint='api'), dict(id=2, endpoint='api')],
+				relative_endpoints=[], schema=[], schema_data=[]
+			))
+		self.assertEqual(response.status_code, 409)
+		self.assertEqual(response.json(), dict(error='The imported data contains duplicate endpoints'))
+		self.assertEqual(list(BaseEndpoint.objects.values_list('endpoint', flat=True)), ['existing'])
+
+
+class ResponseTest(ApiTestCase):
+	def test_dict_response(self):
+		BaseEndpoint.objects.create(endpoint='api')
+		response = self.client.get('/api/base-endpoints/get/')
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response['Content-Type'], 'application/json')
+		self.assertEqual([endpoint['endpoint'] for endpoint in response.json()['baseEndpoints']], ['api'])
+
+	def test_error_response(self):
+		base_endpoint = BaseEndpoint.objects.create(endpoint='api')
+		response = self.post('relative-endpoints/add/', dict(id=base_endpoint.id, endpoint='users', method='FETCH'))
+		self.assertEqual(response.status_code, 409)
+		self.assertEqual(response.json(), dict(error='Please enter valid method, i.e. one of GET, POST, PUT'))
+
+	def test_jsonify_strips_status_code(self):
+		response = jsonify(dict(error='Not allowed', status_code=409))
+		self.assertEqual(response.status_code, 409)
+		self.assertEqual(json.loads(response.content), dict(error='Not allowed'))
+
+	def test_non_str_keys_and_django_types(self):
+		response = jsonify({1: Decimal('1.50'), 'label': gettext_lazy('name')})
+		self.assertEqual(json.loads(response.content), {'1': '1.50', 'label': 'name'})
 
-# Create your tests here.
+	def test_unknown_type_is_an_error(self):
+		with self.assertRaises(TypeError):
+			OrjsonResponse(dict(value=object()))
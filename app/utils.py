@@ -1,4 +1,9 @@
 import re
+from itertools import islice
+
+import orjson
+
+ENDPOINT_PARAM_PATTERN = re.compile(r':(.*?)/')
 
 
 def format_and_regex_endpoint(endpoint):
@@ -6,8 +11,18 @@ def format_and_regex_endpoint(endpoint):
         endpoint = '/' + endpoint
     if not endpoint.endswith('/'):
         endpoint += '/'
-    regex_endpoint = endpoint
-    pat = re.compile(r':(.*?)/')
-    for url_param in pat.findall(endpoint):
-        regex_endpoint = regex_endpoint.replace(f':{url_param}', f'<str:{url_param}>')
+    regex_endpoint = ENDPOINT_PARAM_PATTERN.sub(r'<str:\1>/', endpoint)
     return endpoint, regex_endpoint
+
+
+def stream_json_array(rows, chunk_size=2000):
+    # encodes rows lazily, yielding one chunk of `chunk_size` rows at a time
+    rows = iter(rows)
+    separator = b'['
+    while True:
+        chunk = [orjson.dumps(row) for row in islice(rows, chunk_size)]
+        if not chunk:
+            break
+        yield separator + b','.join(chunk)
+        separator = b','
+    yield b'[]' if separator == b'[' else b']'
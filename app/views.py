@@ -1,4 +1,4 @@
-from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.views.decorators.http import require_GET, require_POST
 
 from .validators import *
@@ -21,8 +21,8 @@ def get_base_endpoints(_):
 @create_base_endpoint_schema
 def add_base_endpoint(request):
 	data = request.json
-	endpoint = base_endpoint_add(data)
-	return dict(id=endpoint.id)
+	endpoint_id = base_endpoint_add(data)
+	return dict(id=endpoint_id)
 
 
 @require_GET
@@ -56,7 +56,6 @@ def get_schemas(_):
 
 @require_POST
 @create_schema_schema
-@transaction.atomic
 def add_schema(request):
 	data = request.json
 	schema = schema_add(data)
@@ -81,8 +80,7 @@ def delete_relative_endpoint(request):
 
 @require_GET
 def export_data(request):
-	data = data_export()
-	return data
+	return StreamingHttpResponse(data_export(), content_type='application/json')
 
 
 @require_POST
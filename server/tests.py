@@ -0,0 +1,27 @@
+from django.test import TestCase
+
+from app.models import BaseEndpoint, RelativeEndpoint, Field
+
+
+class RouterTest(TestCase):
+    def setUp(self):
+        base_endpoint = BaseEndpoint.objects.create(endpoint='api')
+        endpoint = RelativeEndpoint.objects.create(
+            base_endpoint=base_endpoint, endpoint='/users/:id/', regex_endpoint='/users/<str:id>/', method='GET'
+        )
+        Field.objects.create(relative_endpoint=endpoint, key='id', type='url_param', value='id')
+
+    def test_url_param_is_extracted(self):
+        response = self.client.get('/server/api/users/5/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), dict(id='5'))
+
+    def test_unmatched_route_is_not_found(self):
+        response = self.client.get('/server/api/posts/5/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), dict(error='Matching api endpoint not found'))
+
+    def test_method_mismatch_is_not_allowed(self):
+        response = self.client.post('/server/api/users/5/')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), dict(error='This method is not allowed'))
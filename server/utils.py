@@ -1,12 +1,12 @@
 from app.models import Schema
 
 from .fakers import get_random_value
-import json
+import orjson
 
 class Response:
     def __init__(self, fields, meta_data, page_no, url_params, query_params):
         self.fields = fields
-        self.meta_data = json.loads(meta_data)
+        self.meta_data = orjson.loads(meta_data)
         self.page_no = int(page_no)
         self.url_params = url_params
         self.query_params = query_params
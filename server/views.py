@@ -1,13 +1,21 @@
-from django.http import JsonResponse
+from functools import lru_cache
+import re
+
 from django.db.models.functions import Concat
-from django.urls.resolvers import RegexPattern, _route_to_regex
+from django.urls.resolvers import _route_to_regex
 
 from app.models import RelativeEndpoint
 from utils.queryset import query_debugger
 from utils.exceptions import NotFound, NotAllowed
+from utils.response import OrjsonResponse
 from .utils import Response
 
 
+@lru_cache(maxsize=2048)
+def route_pattern(route):
+    return re.compile(_route_to_regex(route)[0])
+
+
 # @query_debugger
 def abc(request, route):
     endpoints = RelativeEndpoint.objects.annotate(
@@ -16,11 +24,9 @@ def abc(request, route):
     #   metas = RelativeEndpoint.objects.filter()
     url_params = {}
     for _route in endpoints:
-        regex = _route_to_regex(_route.final_endpoint)
-        f = RegexPattern(regex[0])
-        is_match = f.match(route)
+        is_match = route_pattern(_route.final_endpoint).search(route)
         if is_match is not None:
-            url_params = is_match[2]
+            url_params = is_match.groupdict()
             endpoint = _route
             break
     if endpoint is None:
@@ -28,4 +34,4 @@ def abc(request, route):
     if request.method != endpoint.method:
         raise NotAllowed("This method is not allowed")
     response = Response(endpoint.fields.all(), endpoint.meta_data, request.GET.get('pageNo', '1'), url_params, request.GET.dict())
-    return JsonResponse(response.create_response())
+    return OrjsonResponse(response.create_response())
@@ -1,3 +1,4 @@
+from django.db import transaction, IntegrityError
 from django.db.models import Manager
 from .queryset import BaseQuerySet
 
@@ -9,7 +10,13 @@ class BaseManager(Manager.from_queryset(BaseQuerySet)):
         try:
             return super().get_or_create(defaults, **kwargs)
         except NotFound:
-            return super().create(**kwargs)
+            params = {**kwargs, **(defaults or {})}
+            try:
+                with transaction.atomic(using=self.db):
+                    return super().create(**params), True
+            except IntegrityError:
+                # created concurrently, same fallback as django's get_or_create
+                return super().get(**kwargs), False
 
     def get(self, **kwargs):
         try:
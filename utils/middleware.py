@@ -1,29 +1,27 @@
 import django.middleware.common as common
-import json
-from django.http import JsonResponse
+import orjson
 import traceback
 
 from mock_server_backend.settings import DEBUG
 from .exceptions import AccessDenied
+from .response import OrjsonResponse
 
 
 def jsonify(data):
     status_code = int(data.get("status_code", 200))
     if "status_code" in data:
         del data["status_code"]
-    return JsonResponse(data, status=status_code, json_dumps_params=dict(indent=4))
+    return OrjsonResponse(data, status=status_code, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
 
 
 class CustomMiddleware(common.CommonMiddleware):
     def process_request(self, request):
         super(CustomMiddleware, self).process_request(request)
-        if request.method == "OPTIONS" or "/admin/" in request.path:
+        # only POST views read request.json, so other methods skip parsing the body
+        if request.method != "POST" or "/admin/" in request.path:
             return
         if request.content_type == "application/json":
-            if request.body:
-                request.json = json.loads(request.body)
-            else:
-                request.json = dict()
+            request.json = orjson.loads(request.body) if request.body else dict()
 
     def process_response(self, request, response):
         if "/admin/" in request.path:
@@ -23,6 +23,10 @@ class AutoCreatedUpdatedMixin(models.Model):
 
     objects = BaseManager()
 
+    @staticmethod
+    def now():
+        return tz.now() + tz.timedelta(hours=5, minutes=30)
+
     class Meta:
         abstract = True
         ordering = ['-updated_at']
@@ -30,13 +34,13 @@ class AutoCreatedUpdatedMixin(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.created_at:
-            self.created_at = tz.now() + tz.timedelta(hours=5, minutes=30)
+            self.created_at = self.now()
             self.updated_at = self.created_at
         else:
             auto_updated_at_is_disabled = kwargs.pop("disable_auto_updated_at", False)
             if not auto_updated_at_is_disabled:
-                self.updated_at = tz.now() + tz.timedelta(hours=5, minutes=30)
-        self.full_clean()
+                self.updated_at = self.now()
+        self.full_clean(validate_unique=False)  # unique constraints are enforced by the database
         super(AutoCreatedUpdatedMixin, self).save(*args, **kwargs)
 
     def detail(self):
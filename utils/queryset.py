@@ -1,9 +1,12 @@
 from django.db.models import QuerySet
-from django.db import reset_queries, connection
+from django.db import reset_queries, connection, connections
+import csv
+import io
 import json
 import time
 from django.core import serializers
 from django.core.paginator import Paginator
+from django.core.management.color import no_style
 
 from .exceptions import NotFound
 
@@ -28,6 +31,23 @@ class BaseQuerySet(QuerySet):
 			return paginator.num_pages, self.model.objects.none()
 		return paginator.num_pages, paginator.get_page(page_no).object_list
 
+	def bulk_insert(self, fields, rows, batch_size=1000):
+		# rows is a list of tuples ordered like fields, postgres streams them with COPY instead of going
+		# through the orm, returns the number of inserted rows on every backend
+		connection = connections[self.db]
+		if connection.vendor != 'postgresql':
+			objs = [self.model(**dict(zip(fields, row))) for row in rows]
+			self.bulk_create(objs, batch_size=batch_size)
+			return len(objs)
+		buffer = io.StringIO()
+		csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(rows)  # quote everything so '' is not read as NULL
+		buffer.seek(0)
+		table = connection.ops.quote_name(self.model._meta.db_table)
+		columns = ', '.join(connection.ops.quote_name(self.model._meta.get_field(field).column) for field in fields)
+		with connection.cursor() as cursor, connection.wrap_database_errors:  # copy_expert raises raw driver errors
+			cursor.copy_expert(f'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+		return len(rows)
+
 	def get(self, **kwargs):
 		try:
 			return super().get(**kwargs)
@@ -35,6 +55,21 @@ class BaseQuerySet(QuerySet):
 			raise NotFound(f'The {self.model._meta.model_name} requested for does not exist')
 
 
+def clear_tables(*models):
+	# skips django's deletion collector and signals, models should be ordered children first
+	for model in models:
+		queryset = model.objects.all()
+		queryset._raw_delete(queryset.db)
+
+
+def reset_sequences(*models):
+	statements = connection.ops.sequence_reset_sql(no_style(), models)
+	if statements:
+		with connection.cursor() as cursor:
+			for statement in statements:
+				cursor.execute(statement)
+
+
 def query_debugger(func):
 	def inner(*args, **kwargs):
 		reset_queries()
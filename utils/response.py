@@ -0,0 +1,10 @@
+import orjson
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+
+class OrjsonResponse(HttpResponse):
+    def __init__(self, data, option=None, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        content = orjson.dumps(data, default=DjangoJSONEncoder().default, option=option)
+        super().__init__(content=content, **kwargs)
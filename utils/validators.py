@@ -1,4 +1,4 @@
-import jsonschema
+import fastjsonschema
 from collections import ChainMap
 
 from .exceptions import AccessDenied
@@ -22,28 +22,27 @@ def create_schema(props):
 
 
 def validate(*_properties):
+    properties = dict(ChainMap(*_properties))
+    properties, required = create_schema(properties)
+    validator = fastjsonschema.compile(dict(
+        type="object",
+        properties=properties,
+        required=required
+    ))
+
     def inner(func):
         def inner2(request, **kwargs):
             if 'json' in request.__dict__:
                 data = request.json
             else:
                 data = request.POST.dict()
-            properties = dict(ChainMap(*_properties))
-            properties, required = create_schema(properties)
-
-            schema = dict(
-                type="object",
-                properties=properties,
-                required=required
-            )
             try:
-                jsonschema.validate(data, schema)
-                return func(request, **kwargs)
-            except jsonschema.exceptions.ValidationError as e:
-                path = ''
-                for i in e.path:
-                    path += f'{i}.'
-                raise AccessDenied(f'{path}{e.message}')
+                validator(data)
+            except fastjsonschema.JsonSchemaValueException as e:
+                path = '.'.join(e.path[1:])  # drop the leading 'data' fastjsonschema names the request body
+                rule = e.message[len(e.name):].strip()
+                raise AccessDenied(f'{path} {rule}' if path else rule)
+            return func(request, **kwargs)
         return inner2
     return inner
 